@@ -1,4 +1,17 @@
+import functools
+import glob
+import hashlib
+import openpyxl
+import operator
 import pandas as pd
+import pyarrow.feather
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # calamine is optional; openpyxl remains the fallback
+    CalamineWorkbook = None
 import dash
 import os
 import re
@@ -6,68 +19,232 @@ from dash import dcc, html
 from dash.dependencies import Input, Output, State
 import dash_table
 import dash_bootstrap_components as dbc
+from flask_caching import Cache
+
+# Directory for cached copies of the cleaned Excel data
+CACHE_DIR = '.cache'
+
+# Bump whenever the cleaning/merge output changes shape, so caches written by
+# older code are ignored (and pruned) instead of served with the old schema
+CACHE_VERSION = 2
+
+# Downtime-count buckets offered by the dropdown, resolved once at import to
+# (low, high) bounds; high=None means unbounded
+DOWNTIME_CRITERIA = {
+    '1-3': (1, 3),
+    '4-5': (4, 5),
+    '>5': (6, None),
+    '>10': (11, None),
+}
+
+def _cache_key(path):
+    """Cache key for a source file: a stable id plus schema version and the
+    file's current mtime/size."""
+    stat = os.stat(path)
+    return (f'{hashlib.md5(path.encode()).hexdigest()}'
+            f'-v{CACHE_VERSION}-{stat.st_mtime_ns}-{stat.st_size}')
+
+def _prune_stale(cache_path, pattern):
+    """Delete cache files matching ``pattern`` other than the current one."""
+    for stale in glob.glob(os.path.join(CACHE_DIR, pattern)):
+        if stale != cache_path:
+            os.remove(stale)
+
+def _load_cached(path, cleaner):
+    """Load a cleaned frame through a Parquet cache keyed on the source file.
+
+    Parsing the xlsx workbooks is by far the slowest part of startup, so the
+    cleaned result is stored as Parquet keyed on the source file's mtime and
+    size. Warm starts then read the columnar cache instead of re-parsing the
+    workbook; editing or replacing the workbook invalidates the key.
+    """
+    key = _cache_key(path)
+    cache_path = os.path.join(CACHE_DIR, f'{key}.parquet')
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path, engine='pyarrow')
+    df = cleaner(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+    _prune_stale(cache_path, f"{key.split('-', 1)[0]}-*.parquet")
+    return df
+
+# Columns of interest in the two report sheets (both have data from row 7
+# onwards); keys are zero-based positions in the sheet
+DATA1_COLUMNS = {1: 'IP Address', 5: 'Event', 6: 'Alarm Time', 10: 'Node Alias'}
+DATA2_COLUMNS = {0: 'Node Alias', 1: 'IP Address', 4: 'Availability',
+                 5: 'Latency(msec)', 6: 'Packet Loss(%)'}
+
+def _read_sheet(path, columns):
+    """Read selected columns of the first worksheet into a DataFrame.
+
+    Prefers python-calamine (a Rust xlsx parser, roughly an order of magnitude
+    faster than openpyxl) when it is installed, and otherwise falls back to
+    openpyxl's read_only mode, which streams rows instead of building the full
+    XML DOM that pd.read_excel would. Only the cells named in ``columns`` (a
+    position -> name mapping) are materialized, so unused report columns never
+    reach pandas, and no rename/drop pass is needed afterwards.
+    """
+    idx = list(columns)
+    if CalamineWorkbook is not None:
+        wb = None
+        # skip_empty_area=False keeps the blank preamble rows so [6:] lines up
+        # with openpyxl's absolute min_row=7; calamine also returns '' for
+        # empty cells where openpyxl returns None
+        raw = (CalamineWorkbook.from_path(path).get_sheet_by_index(0)
+               .to_python(skip_empty_area=False)[6:])
+    else:
+        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        raw = wb.active.iter_rows(min_row=7, max_col=max(idx) + 1, values_only=True)
+    rows = [tuple(row[i] if i < len(row) and row[i] != '' else None for i in idx)
+            for row in raw]
+    if wb is not None:
+        wb.close()
+    return pd.DataFrame.from_records(rows, columns=list(columns.values()))
 
 # Data Cleaning Functions
 def data1_clean(file1_path):
-    df = pd.read_excel(file1_path, skiprows=5)
-    df = df.rename(columns={
-        'Unnamed: 0': 'Sl.no',
-        'Unnamed: 1': 'IP Address',
-        'Unnamed: 4': 'Event',
-        'Unnamed: 6': 'Alarm Time',
-        'Unnamed: 2': 'Node Alias'  # Rename Host Name to Node Alias
-    })
-    df = df.drop(columns=['Sl.no', 'Clear Time', 'Duration', 'Description', 'Host Name'], errors='ignore')  # Dropping unnecessary columns
+    df = _read_sheet(file1_path, DATA1_COLUMNS)
     df = df.dropna(subset=['Node Alias', 'Alarm Time'])  # Dropping rows with NaN in important columns
     df['Alarm Time'] = pd.to_datetime(df['Alarm Time'], errors='coerce')
     df = df.dropna(subset=['Alarm Time'])  # Ensure Alarm Time is datetime
+    # Repeated strings are much cheaper to mask/group as integer category codes
+    df['Node Alias'] = df['Node Alias'].astype('category')
+    df['IP Address'] = df['IP Address'].astype('category')
     return df
 
 def data2_clean(file2_path):
-    df = pd.read_excel(file2_path)
-    df = df.drop([0, 1, 2, 3, 4], axis=0).reset_index(drop=True)
-    df = df.drop(columns=['Unnamed: 2', 'Unnamed: 3'], errors='ignore')
-    df = df.rename(columns={
-        'Unnamed: 0': 'Node Alias',
-        'Unnamed: 1': 'IP Address',
-        'Unnamed: 4': 'Availability',
-        'Unnamed: 5': 'Latency(msec)',
-        'Unnamed: 6': 'Packet Loss(%)'
-    })
+    df = _read_sheet(file2_path, DATA2_COLUMNS)
     df['Packet Loss(%)'] = pd.to_numeric(df['Packet Loss(%)'], errors='coerce')
     df['Availability'] = pd.to_numeric(df['Availability'], errors='coerce')
     df['Latency(msec)'] = pd.to_numeric(df['Latency(msec)'], errors='coerce')
     df = df.dropna(subset=['Packet Loss(%)', 'Availability', 'Latency(msec)'])
+    # All three metrics are 0-100 with two decimals; float32 halves the bytes
+    # every downstream mask and aggregation has to move
+    df[['Availability', 'Latency(msec)', 'Packet Loss(%)']] = \
+        df[['Availability', 'Latency(msec)', 'Packet Loss(%)']].astype('float32')
+    df['Node Alias'] = df['Node Alias'].astype('category')
+    df['IP Address'] = df['IP Address'].astype('category')
     return df
 
 # File Paths
 file1_path = 'data.xlsx'
 file2_path = 'data2.xlsx'
 
-# Cleaned DataFrames
-df1_cleaned = data1_clean(file1_path)
-df2_cleaned = data2_clean(file2_path)
+ReportData = namedtuple('ReportData', ['merged', 'daily', 'avail_by_alias',
+                                       'min_date', 'max_date'])
 
-# Merge DataFrames on 'IP Address', adding 'Availability' to df1
-merged_df = pd.merge(df1_cleaned, df2_cleaned[['IP Address', 'Availability']], on='IP Address', how='left')
-downtime_count = (
-    merged_df.groupby('Node Alias')['Alarm Time']
-    .nunique()
-    .reset_index(name='Downtime Count')
-)
+def _load_merged():
+    """Build the merged event frame, cached as memory-mapped Feather.
+
+    The final cleaned-and-merged frame is persisted uncompressed so that
+    re-imports (debug auto-reload) and sibling gunicorn workers map the same
+    physical pages via the kernel instead of re-reading and re-joining the
+    per-file Parquet caches.
+    """
+    cache_path = os.path.join(
+        CACHE_DIR, f'merged-{_cache_key(file1_path)}-{_cache_key(file2_path)}.feather')
+    if os.path.exists(cache_path):
+        return pyarrow.feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    # The two workbooks are independent; load them concurrently (openpyxl and
+    # calamine release the GIL during decompression and parsing)
+    with ThreadPoolExecutor(2) as ex:
+        f1 = ex.submit(_load_cached, file1_path, data1_clean)
+        f2 = ex.submit(_load_cached, file2_path, data2_clean)
+        df1, df2 = f1.result(), f2.result()
+
+    # df2 carries one Availability per IP, so attaching it to the events is a
+    # plain lookup: map against an IP-indexed Series instead of paying for a
+    # hash join and its temporary frame (astype keeps the float32 downcast,
+    # which map widens when it has to introduce NaN for unmatched IPs)
+    avail_by_ip = df2.drop_duplicates('IP Address').set_index('IP Address')['Availability']
+    merged = df1.assign(
+        Availability=df1['IP Address'].map(avail_by_ip).astype('float32'))
+
+    # Sort by Alarm Time so everything downstream sees chronological order
+    merged = merged.sort_values('Alarm Time').reset_index(drop=True)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    pyarrow.feather.write_feather(merged, cache_path, compression='uncompressed')
+    _prune_stale(cache_path, 'merged-*.feather')
+    return merged
+
+@functools.cache
+def get_data():
+    """Load, clean and merge the report data, once per process.
+
+    Every caller (layout build, callbacks) shares the cached result, so the
+    Excel ingest is no longer paid on each module import. When serving with
+    gunicorn, use --preload so the frames are parsed once in the master and
+    inherited by the workers copy-on-write.
+    """
+    merged = _load_merged()
+
+    # Guard the dtype once here so no callback ever needs a defensive reparse
+    assert pd.api.types.is_datetime64_any_dtype(merged['Alarm Time'])
+
+    # Precompute the (day x Node Alias) downtime cube and the per-alias
+    # availability once; a date-range query then reduces a small cube slice
+    # instead of re-scanning and re-counting the raw event rows
+    # sort=False keeps group order as encountered; the days still come out
+    # chronological (and the cube's .loc slicing stays valid) because merged
+    # is pre-sorted by Alarm Time
+    daily = (
+        merged.assign(d=merged['Alarm Time'].dt.floor('D'))
+        .groupby(['d', 'Node Alias'], observed=True, sort=False)
+        .size()
+        .unstack(fill_value=0)
+        .astype('int32')  # daily outage counts are tiny; halve the cube
+    )
+    avail_by_alias = merged.groupby('Node Alias', observed=True, sort=False)['Availability'].mean()
+
+    # Determine min and max dates for DatePickerRange; merged is sorted by
+    # Alarm Time, so they are simply the first and last rows
+    if len(merged):
+        min_date = merged['Alarm Time'].iloc[0]
+        max_date = merged['Alarm Time'].iloc[-1]
+    else:
+        # Fallback in case merged is empty
+        min_date = pd.to_datetime('2020-01-01')  # Example default date
+        max_date = pd.to_datetime('2020-12-31')  # Example default date
+
+    return ReportData(merged, daily, avail_by_alias, min_date, max_date)
 
 # Initialize Dash App with Bootstrap Theme
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.CYBORG])
+cache = Cache(app.server, config={'CACHE_TYPE': 'SimpleCache'})
+
+@cache.memoize(timeout=300)
+def _compute_records(start_date, end_date, downtime_criteria):
+    """Table records for one filter combination, memoized per combination.
 
-# Determine min and max dates for DatePickerRange
-min_date = merged_df['Alarm Time'].min()
-max_date = merged_df['Alarm Time'].max()
+    Users routinely flip between a handful of date ranges and buckets, so
+    repeated selections are served from the cache without touching the cube.
+    """
+    data = get_data()
 
-# Fallback in case merged_df is empty
-if pd.isnull(min_date):
-    min_date = pd.to_datetime('2020-01-01')  # Example default date
-if pd.isnull(max_date):
-    max_date = pd.to_datetime('2020-12-31')  # Example default date
+    # Per-node downtime counts for the window: sum a slice of the precomputed
+    # per-day cube (the DatetimeIndex slice is inclusive of the end day)
+    counts = data.daily.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)].sum(axis=0)
+    counts = counts[counts > 0]  # only nodes that went down in the window
+
+    # Apply downtime criteria filter via the precompiled bounds table
+    low, high = DOWNTIME_CRITERIA.get(downtime_criteria, (1, None))
+    counts = counts[counts >= low] if high is None else counts[(counts >= low) & (counts <= high)]
+
+    # Attach the per-alias availability prebuilt at load time and build the
+    # DataTable records directly: tolist() converts each column to Python in
+    # one C call, instead of to_dict('records') boxing value by value.
+    # round() scrubs the float32 repr artifacts (88.76000213623047) back to
+    # the two-decimal values the report shows and filters against
+    aliases = counts.index.tolist()
+    avail = data.avail_by_alias.reindex(counts.index).tolist()
+    return [{'Node Alias': a, 'Availability': round(v, 2)} for a, v in zip(aliases, avail)]
+
+# Layout-time view of the data (same cached object the callbacks see)
+_data = get_data()
+min_date = _data.min_date
+max_date = _data.max_date
 
 # Layout
 custom_label_style = {
@@ -86,8 +263,6 @@ custom_dropdown_style = {
     "boxShadow": "0 4px 8px rgba(0, 0, 0, 0.1)"  # Add slight shadow for depth
 }
 
-downtime_options = [{'label': str(count), 'value': count} for count in downtime_count['Downtime Count'].unique()]
-
 app.layout = dbc.Container(
     fluid=True,
     style={
@@ -211,8 +386,12 @@ app.layout = dbc.Container(
                                 ],
                                 style_as_list_view=True,
                                 page_size=20,
-                                sort_action='native',
-                                filter_action='native'
+                                page_current=0,
+                                page_action='custom',
+                                sort_action='custom',
+                                sort_by=[],
+                                filter_action='custom',
+                                filter_query=''
                             )
                         )
                     ],
@@ -224,42 +403,85 @@ app.layout = dbc.Container(
     ]
 )
 
+# Comparison operators understood in the DataTable's filter_query syntax,
+# longest spelling first so e.g. '>=' is not split as '>'
+_FILTER_OPERATORS = [
+    (('ge ', '>='), operator.ge),
+    (('le ', '<='), operator.le),
+    (('ne ', '!='), operator.ne),
+    (('gt ', '>'), operator.gt),
+    (('lt ', '<'), operator.lt),
+    (('eq ', '='), operator.eq),
+    (('contains ',), 'contains'),
+    (('datestartswith ',), 'datestartswith'),
+]
+
+def _split_filter_part(filter_part):
+    """Parse one '{column} op value' clause of a DataTable filter_query."""
+    for spellings, op in _FILTER_OPERATORS:
+        for spelling in spellings:
+            if spelling in filter_part:
+                name_part, value_part = filter_part.split(spelling, 1)
+                name = name_part[name_part.find('{') + 1:name_part.rfind('}')]
+                value_part = value_part.strip()
+                if value_part and value_part[0] == value_part[-1] and value_part[0] in "'\"`":
+                    value = value_part[1:-1].replace('\\' + value_part[0], value_part[0])
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+                return name, op, value
+    return None, None, None
+
+def _apply_filter_query(records, filter_query):
+    """Filter the record dicts with the table's filter_query clauses."""
+    for part in filter_query.split(' && '):
+        col, op, value = _split_filter_part(part)
+        if col is None:
+            continue
+        if op == 'contains':
+            records = [r for r in records if str(value) in str(r[col])]
+        elif op == 'datestartswith':
+            records = [r for r in records if str(r[col]).startswith(str(value))]
+        else:
+            kept = []
+            for r in records:
+                try:
+                    if r[col] is not None and op(r[col], value):
+                        kept.append(r)
+                except TypeError:  # e.g. comparing a string cell to a number
+                    pass
+            records = kept
+    return records
+
 # Callback Function
 @app.callback(
-    Output('filtered-table', 'data'),
-    [Input('filter-button', 'n_clicks')],
+    [Output('filtered-table', 'data'),
+     Output('filtered-table', 'page_count')],
+    [Input('filter-button', 'n_clicks'),
+     Input('filtered-table', 'page_current'),
+     Input('filtered-table', 'page_size'),
+     Input('filtered-table', 'sort_by'),
+     Input('filtered-table', 'filter_query')],
     [State('date-range', 'start_date'),
      State('date-range', 'end_date'),
      State('downtime-dropdown', 'value')]
-)   
-def update_table(n_clicks, start_date, end_date, downtime_criteria):
-    # Filter by date range
-    filtered_df = merged_df[(merged_df['Alarm Time'] >= start_date) & (merged_df['Alarm Time'] <= end_date)]
-
-    # Count occurrences of each Node Alias (Downtime Count)
-    downtime_count = filtered_df['Node Alias'].value_counts().reset_index()
-    downtime_count.columns = ['Node Alias', 'Downtime Count']
-
-    # Merge with the filtered DataFrame to include downtime count
-    filtered_df = pd.merge(filtered_df, downtime_count, on='Node Alias')
-
-    # Apply downtime criteria filter
-    if downtime_criteria == '1-3':
-        filtered_df = filtered_df[(filtered_df['Downtime Count'] >= 1) & (filtered_df['Downtime Count'] <= 3)]
-    elif downtime_criteria == '4-5':
-        filtered_df = filtered_df[(filtered_df['Downtime Count'] >= 4) & (filtered_df['Downtime Count'] <= 5)]
-    elif downtime_criteria == '>5':
-        filtered_df = filtered_df[filtered_df['Downtime Count'] > 5]
-    elif downtime_criteria == '>10':  # New filter for >10
-        filtered_df = filtered_df[filtered_df['Downtime Count'] > 10]
-
-    # Keep only unique 'Node Alias' and the columns you need (e.g., 'Availability')
-    filtered_df = filtered_df.groupby('Node Alias').agg({
-        'Availability': 'mean',  # Or use another aggregation method
-    }).reset_index()
-
-    # Return the filtered data for the DataTable
-    return filtered_df.to_dict('records')
+)
+def update_table(n_clicks, page_current, page_size, sort_by, filter_query,
+                 start_date, end_date, downtime_criteria):
+    records = _compute_records(start_date, end_date, downtime_criteria)
+    # Filter, sort and paginate server-side so only the visible page is
+    # serialized; the record set is tiny post-aggregation
+    if filter_query:
+        records = _apply_filter_query(records, filter_query)
+    if sort_by:
+        col = sort_by[0]['column_id']
+        records = sorted(records, key=lambda r: (r[col] is None, r[col]),
+                         reverse=sort_by[0]['direction'] == 'desc')
+    page_count = max(1, -(-len(records) // page_size)) if page_size else 1
+    start = page_current * page_size
+    return records[start:start + page_size], page_count
 # Run the app
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))